@@ -1,281 +1,441 @@
-from datetime import datetime, timezone
-import os
-import json
-import time
-import uuid
-import sys
-from dotenv import load_dotenv
-from zoneinfo import ZoneInfo
-from azure.identity import AzureCliCredential
-from azure.mgmt.automation import AutomationClient
-from azure.mgmt.authorization import AuthorizationManagementClient
-from azure.mgmt.resource import ResourceManagementClient
-from azure.core.exceptions import ResourceNotFoundError
-
-load_dotenv()
-
-RG = os.environ["AUTOMATION_RESOURCE_GROUP_NAME"]
-LOC = os.environ["LOCATION"]
-AA = os.environ["AUTOMATION_ACCOUNT_NAME"]
-SUBSCRIPTION_ID = os.environ["SUBSCRIPTION_ID"]
-
-VARS_JSON_REL = os.environ["AUTOMATION_VARIABLES_JSON"]
-SCHEDULES_JSON_REL = os.environ.get("AUTOMATION_SCHEDULES_JSON")
-RESOURCE_DEF_JSON_REL = os.environ.get("PTU_RESOURCES_JSON")
-UPDATE_RUNBOOK_PATH_REL = os.environ["UPDATE_RUNBOOK_PATH"]
-UPDATE_RUNBOOK_NAME = os.environ["UPDATE_RUNBOOK_NAME"]
-
-vars_path = os.path.abspath(VARS_JSON_REL)
-schedules_path = os.path.abspath(SCHEDULES_JSON_REL)
-resource_def_path = os.path.abspath(RESOURCE_DEF_JSON_REL)
-update_runbook_path =  os.path.abspath(UPDATE_RUNBOOK_PATH_REL)
-
-with open(vars_path, "r", encoding="utf-8") as f:
-    vars_data = json.load(f)
-
-schedules_data = []
-if schedules_path and os.path.exists(schedules_path):
-    with open(schedules_path, "r", encoding="utf-8") as f:
-        schedules_data = json.load(f)
-else:
-    print(f"Schedules file not found or not specified: {schedules_path}")
-
-with open(resource_def_path, "r", encoding="utf-8") as f:
-    resource_def_data = json.load(f)
-    ptu_rg = resource_def_data["ResourceGroupName"]
-    ptu_account_name = resource_def_data["AccountName"]                                      
-
-ptu_subscription_resource_id = f"/subscriptions/{SUBSCRIPTION_ID}"
-ptu_account_required_role = "Cognitive Services Contributor"
-
-credential = AzureCliCredential()
-automation_client = AutomationClient(credential, SUBSCRIPTION_ID)
-auth_client = AuthorizationManagementClient(credential, SUBSCRIPTION_ID)
-resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID)
-
-def find_role_definition_id(scope: str, role_name: str) -> str:
-    for rd in auth_client.role_definitions.list(scope, filter=f"roleName eq '{role_name}'"):
-        return rd.id
-    raise RuntimeError(f"Role definition '{role_name}' not found in scope {scope}")
-
-def ensure_role_assignment(principal_id: str, scope: str, role_name: str):
-    role_def_id = find_role_definition_id(scope, role_name)
-
-    existing = [
-        ra for ra in auth_client.role_assignments.list_for_scope(scope)
-        if ra.principal_id == principal_id and ra.role_definition_id.lower() == role_def_id.lower()
-    ]
-    if existing:
-        print(f"Role '{role_name}' already assigned on {scope}")
-        return
-    assignment_name = str(uuid.uuid4())
-    print(f"Assigning role '{role_name}' on {scope}")
-
-    auth_client.role_assignments.create(
-        scope,
-        assignment_name,
-        {
-            "principal_id": principal_id,
-            "role_definition_id": role_def_id,
-        },
-    )
-
-def ensure_automation_account():
-    print(f"[?] Ensuring Automation Account '{AA}' in resource group '{RG}'")
-
-    try:
-        acct = automation_client.automation_account.get(RG, AA)
-        print("  [FOUND] Using existing Automation Account. Please ensure it has a managed identity assigned, with role 'Cognitive Services Contributor' or equivalent permissions assigned on the PTU resource or the Subscription.")
-
-    except ResourceNotFoundError:
-        print("  [NEW] Creating Automation Account...")
-        acct = automation_client.automation_account.create_or_update(
-            RG,
-            AA,
-            {
-                "location": LOC,
-                "sku": {"name": "Basic"},
-            },
-        )
-        
-        poller = resource_client.resources.begin_update_by_id(
-            acct.id,
-            "2024-10-23",
-            {
-                "identity": {
-                    "type": "SystemAssigned"
-                }
-            }
-        )
-        result = poller.result()
-        time.sleep(30)
-        managed_identity = result.identity
-        principal_id = managed_identity.principal_id
-        if not principal_id:
-            raise RuntimeError(f"Managed identity was not assigned properly to {acct.id}.")
-
-        ensure_role_assignment(principal_id, ptu_subscription_resource_id, ptu_account_required_role)
-        
-    return acct
-
-def create_variables():
-    for name, v in vars_data.items():
-        value = json.dumps(v["Value"])
-        encrypted = bool(v.get("Encrypted", False))
-
-        try:
-            varialble = automation_client.variable.get(RG, AA, name)
-            print(f"  [FOUND] Variable '{name}' already exists. Skipping...")
-        except ResourceNotFoundError:
-            print("  [NEW] Creating or updating Automation Variables...")
-            automation_client.variable.create_or_update(
-                RG,
-                AA,
-                name,
-                {
-                    "name": name,
-                    "value": value,
-                    "is_encrypted": encrypted,
-                    "description": "",
-                },
-            )
-
-def run_step(step_name: str, fn, *args, **kwargs):
-    print(f"==> {step_name}")
-    try:
-        result = fn(*args, **kwargs)
-        print(f"[OK] {step_name}")
-        print(20 * "-")
-        return result
-    except Exception as e:
-        print(f"[FAIL] {step_name}: {e}")
-        print(20 * "-")
-        raise
-
-def read_file_utf8(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
-
-def import_and_publish_runbook(runbook_name: str, file_path: str):
-    print(f"  [?] Importing runbook '{runbook_name}' from {file_path}")
-    content = read_file_utf8(file_path)
-    # Create or get runbook
-    try:
-        rb = automation_client.runbook.get(RG, AA, runbook_name)
-        print(f"  [FOUND] Runbook '{runbook_name}' already exists. ")
-    except ResourceNotFoundError:
-        rb = automation_client.runbook.create_or_update(
-            RG,
-            AA,
-            runbook_name,
-            {
-                "location": LOC,
-                "log_verbose": True,
-                "log_progress": True,
-                "runbook_type": "PowerShell72",
-                "draft": {}
-            },
-        )
-        print(f"  [NEW] Created runbook '{runbook_name}'")
-
-    automation_client.runbook_draft.begin_replace_content(RG, AA, runbook_name, content)
-    print(f"  [?] Publishing runbook '{runbook_name}'")
-    poller = automation_client.runbook.begin_publish(RG, AA, runbook_name)
-    poller.result()
-
-def convert_to_utc(iso_str: str, time_zone: str) -> str:
-    if not time_zone or time_zone.upper() == "UTC":
-        return iso_str if iso_str.endswith('Z') else iso_str + 'Z'
-    
-    local_dt = datetime.fromisoformat(iso_str).replace(tzinfo=ZoneInfo(time_zone))
-    utc_dt = local_dt.astimezone(timezone.utc)
-    return utc_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-
-def ensure_schedule(name, schedule_def: dict):
-    description = schedule_def.get("Description", "")
-    frequency = schedule_def["Frequency"]
-    interval = schedule_def["Interval"] if "Interval" in schedule_def else None
-    time_zone = schedule_def.get("TimeZone", "UTC")
-
-    start_time = schedule_def["StartTime"]
-    end_time = schedule_def.get("EndTime", None)
-    start_time_utc = convert_to_utc(start_time, time_zone)
-    end_time_utc = convert_to_utc(end_time, time_zone) if end_time else None
-    if end_time_utc and end_time_utc <= start_time_utc:
-        raise ValueError(f"EndTime {end_time} must be after StartTime {start_time}")
-
-    try:
-        schedule = automation_client.schedule.get(RG, AA, name)
-        print(f"  [FOUND] Schedule '{name}' already exists. Updating is not supported for shared resources. Skipping...")
-    except ResourceNotFoundError:
-        print(f"  [NEW] Creating schedule '{name}'")
-        schedule = automation_client.schedule.create_or_update(
-            RG,
-            AA,
-            name,
-            {
-                "name": name,
-                "description": "",
-                "start_time": start_time_utc,
-                "expiry_time": end_time_utc,
-                "frequency": frequency,
-                "interval": interval,
-                "time_zone": time_zone,
-                "advanced_schedule": None,
-            },
-        )
-    
-        current_status = schedule.is_enabled
-        is_enabled = schedule_def.get("IsEnabled", True)
-        if current_status != is_enabled:
-            print(f"  [?] Updating schedule '{name}' enabled status to {is_enabled}")
-            schedule = automation_client.schedule.update(
-                RG,
-                AA,
-                name,
-                {
-                    "is_enabled": is_enabled
-                }
-            )
-    
-    return schedule
-
-def ensure_schedule_link(name, schedule_def: dict, params: dict):
-    runbook_name = schedule_def["RunbookName"]
-    parameters = schedule_def.get("Parameters", {})
-    parameters.update(params or {})
-
-    existing_links = [js for js in automation_client.job_schedule.list_by_automation_account(RG, AA) if js.schedule.name == name and js.runbook.name == runbook_name]
-    if existing_links:
-        print(f"  [FOUND] Link for schedule '{name}' to runbook '{runbook_name}' already exists. Updating is not supported for schedule job. Skipping...")
-        return
-    
-    job_schedule_id = str(uuid.uuid4())
-    params_payload = { key: str(value) for key, value in parameters.items() } if parameters else {}
-    print(f"  [NEW] Linking schedule '{name}' to runbook '{runbook_name}'")
-    automation_client.job_schedule.create(
-        RG,
-        AA,
-        job_schedule_id,
-        {
-            "schedule": {"name": name},
-            "runbook": {"name": runbook_name},
-            "parameters": params_payload
-        },
-    )
-
-def main():
-    try:
-        run_step("Ensure Automation Account", ensure_automation_account)
-        run_step("Create Variables", create_variables)
-        run_step(f"Import & Publish Runbook {UPDATE_RUNBOOK_NAME}", import_and_publish_runbook, UPDATE_RUNBOOK_NAME, update_runbook_path)
-        for name, s in schedules_data.items():
-            run_step(f"Ensure Schedule {name}", ensure_schedule, name, s)
-            run_step(f"Ensure Schedule Link for {name}", ensure_schedule_link, name, s, resource_def_data)
-        print("Done.")
-    except Exception as e:
-        print("Aborting due to previous failure. ", {e})
-        sys.exit(1)
-
-if __name__ == "__main__":
+from datetime import datetime, timezone
+import functools
+import hashlib
+import os
+import json
+import threading
+import time
+import uuid
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from dotenv import load_dotenv
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import AzureCliCredential
+from azure.mgmt.automation import AutomationClient
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+
+# zoneinfo, azure.mgmt.authorization, and azure.mgmt.resource are imported
+# lazily below: they are only needed for non-UTC schedules and for the
+# new-account path, and keeping them out of cold start trims script startup.
+
+try:
+    # orjson parses/serializes JSON much faster than the stdlib; fall back
+    # silently since it is an optional dependency.
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:
+    _loads = json.loads
+    # Compact separators match orjson's output so stored variable values are
+    # identical regardless of which serializer produced them.
+    _dumps = lambda obj: json.dumps(obj, separators=(",", ":"))
+
+load_dotenv()
+
+def read_file_utf8(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+RG = os.environ["AUTOMATION_RESOURCE_GROUP_NAME"]
+LOC = os.environ["LOCATION"]
+AA = os.environ["AUTOMATION_ACCOUNT_NAME"]
+SUBSCRIPTION_ID = os.environ["SUBSCRIPTION_ID"]
+
+VARS_JSON_REL = os.environ["AUTOMATION_VARIABLES_JSON"]
+SCHEDULES_JSON_REL = os.environ.get("AUTOMATION_SCHEDULES_JSON")
+RESOURCE_DEF_JSON_REL = os.environ.get("PTU_RESOURCES_JSON")
+UPDATE_RUNBOOK_PATH_REL = os.environ["UPDATE_RUNBOOK_PATH"]
+UPDATE_RUNBOOK_NAME = os.environ["UPDATE_RUNBOOK_NAME"]
+
+vars_path = os.path.abspath(VARS_JSON_REL)
+schedules_path = os.path.abspath(SCHEDULES_JSON_REL)
+resource_def_path = os.path.abspath(RESOURCE_DEF_JSON_REL)
+update_runbook_path =  os.path.abspath(UPDATE_RUNBOOK_PATH_REL)
+
+vars_data = _loads(read_file_utf8(vars_path))
+
+schedules_data = []
+if schedules_path and os.path.exists(schedules_path):
+    schedules_data = _loads(read_file_utf8(schedules_path))
+else:
+    print(f"Schedules file not found or not specified: {schedules_path}")
+
+resource_def_data = _loads(read_file_utf8(resource_def_path))
+ptu_rg = resource_def_data["ResourceGroupName"]
+ptu_account_name = resource_def_data["AccountName"]
+
+# Read once at startup and shared with the import/publish step so the runbook
+# file is never re-opened per call.
+update_runbook_content = read_file_utf8(update_runbook_path)
+
+ptu_subscription_resource_id = f"/subscriptions/{SUBSCRIPTION_ID}"
+ptu_account_required_role = "Cognitive Services Contributor"
+
+SCHEDULE_WORKERS = 8
+# ARM LROs default to a 30s retry-after when the service does not specify one;
+# these operations typically finish in seconds, so poll more aggressively.
+LRO_POLLING_INTERVAL = 2
+# With SCHEDULE_WORKERS threads hitting ARM at once, transient 429/503s are
+# likelier; retry a little harder than the defaults but back off quickly.
+RETRY_KWARGS = {"retry_total": 5, "retry_backoff_factor": 0.5}
+
+# All clients (including the per-thread ones) share one requests.Session so
+# TLS connections to ARM are pooled and reused instead of re-handshaken per
+# client. The pool is sized for the schedule workers plus the main thread.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=SCHEDULE_WORKERS + 4),
+)
+transport = RequestsTransport(session=_session, session_owner=False)
+
+credential = AzureCliCredential()
+automation_client = AutomationClient(credential, SUBSCRIPTION_ID, transport=transport, **RETRY_KWARGS)
+
+_auth_client = None
+_resource_client = None
+
+def get_auth_client():
+    global _auth_client
+    if _auth_client is None:
+        from azure.mgmt.authorization import AuthorizationManagementClient
+        _auth_client = AuthorizationManagementClient(credential, SUBSCRIPTION_ID, transport=transport, **RETRY_KWARGS)
+    return _auth_client
+
+def get_resource_client():
+    global _resource_client
+    if _resource_client is None:
+        from azure.mgmt.resource import ResourceManagementClient
+        _resource_client = ResourceManagementClient(credential, SUBSCRIPTION_ID, transport=transport, **RETRY_KWARGS)
+    return _resource_client
+
+_thread_local = threading.local()
+
+def get_automation_client() -> AutomationClient:
+    # SDK clients share a thread-safe transport, but response handling is not
+    # thread-safe, so each worker thread gets its own client from the shared credential.
+    client = getattr(_thread_local, "automation_client", None)
+    if client is None:
+        client = AutomationClient(credential, SUBSCRIPTION_ID, transport=transport, **RETRY_KWARGS)
+        _thread_local.automation_client = client
+    return client
+
+@functools.lru_cache(maxsize=None)
+def find_role_definition_id(scope: str, role_name: str) -> str:
+    # The role name -> definition id mapping is immutable for the life of the
+    # script, so cache it and pay the REST round trip only once per pair.
+    for rd in get_auth_client().role_definitions.list(scope, filter=f"roleName eq '{role_name}'"):
+        return rd.id
+    raise RuntimeError(f"Role definition '{role_name}' not found in scope {scope}")
+
+def ensure_role_assignment(principal_id: str, scope: str, role_name: str):
+    role_def_id = find_role_definition_id(scope, role_name)
+    role_def_id_lower = role_def_id.lower()
+
+    # Server-side filter returns only this principal's assignments at this scope
+    # instead of paging through every assignment in the subscription.
+    assignments = get_auth_client().role_assignments.list_for_scope(
+        scope, filter=f"atScope() and assignedTo('{principal_id}')"
+    )
+    existing = next(
+        (ra for ra in assignments if ra.role_definition_id.lower() == role_def_id_lower),
+        None,
+    )
+    if existing:
+        print(f"Role '{role_name}' already assigned on {scope}")
+        return
+    assignment_name = str(uuid.uuid4())
+    print(f"Assigning role '{role_name}' on {scope}")
+
+    get_auth_client().role_assignments.create(
+        scope,
+        assignment_name,
+        {
+            "principal_id": principal_id,
+            "role_definition_id": role_def_id,
+        },
+    )
+
+def wait_for_identity(acct_id: str, timeout: float = 30.0) -> str:
+    # Identity propagation usually completes in a few seconds; re-GET the
+    # resource with exponential backoff instead of sleeping a fixed 30s.
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        resource = get_resource_client().resources.get_by_id(acct_id, "2024-10-23")
+        identity = resource.identity
+        if identity and identity.principal_id:
+            return identity.principal_id
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f"Managed identity was not assigned properly to {acct_id}.")
+        time.sleep(min(0.5 * 2 ** attempt, 4))
+        attempt += 1
+
+def ensure_automation_account():
+    print(f"[?] Ensuring Automation Account '{AA}' in resource group '{RG}'")
+
+    try:
+        acct = automation_client.automation_account.get(RG, AA)
+        print("  [FOUND] Using existing Automation Account. Please ensure it has a managed identity assigned, with role 'Cognitive Services Contributor' or equivalent permissions assigned on the PTU resource or the Subscription.")
+
+    except ResourceNotFoundError:
+        print("  [NEW] Creating Automation Account...")
+        acct = automation_client.automation_account.create_or_update(
+            RG,
+            AA,
+            {
+                "location": LOC,
+                "sku": {"name": "Basic"},
+            },
+        )
+        
+        poller = get_resource_client().resources.begin_update_by_id(
+            acct.id,
+            "2024-10-23",
+            {
+                "identity": {
+                    "type": "SystemAssigned"
+                }
+            },
+            polling_interval=LRO_POLLING_INTERVAL,
+        )
+        poller.result()
+        principal_id = wait_for_identity(acct.id)
+
+        ensure_role_assignment(principal_id, ptu_subscription_resource_id, ptu_account_required_role)
+        
+    return acct
+
+def ensure_variable(name: str, v: dict, value: str):
+    client = get_automation_client()
+    encrypted = bool(v.get("Encrypted", False))
+
+    try:
+        existing = client.variable.get(RG, AA, name)
+    except ResourceNotFoundError:
+        existing = None
+
+    if existing is not None:
+        if existing.is_encrypted:
+            # GET never returns encrypted values, so equality cannot be
+            # checked; leave existing encrypted variables untouched.
+            print(f"  [FOUND] Encrypted variable '{name}' already exists. Skipping...")
+            return
+        if not encrypted and existing.value == value:
+            print(f"  [FOUND] Variable '{name}' already up to date. Skipping...")
+            return
+        print(f"  [?] Variable '{name}' changed. Updating...")
+    else:
+        print("  [NEW] Creating or updating Automation Variables...")
+
+    client.variable.create_or_update(
+        RG,
+        AA,
+        name,
+        {
+            "name": name,
+            "value": value,
+            "is_encrypted": encrypted,
+            "description": "",
+        },
+    )
+
+def create_variables():
+    # Serialize every value in one batch up front so the workers below do
+    # pure I/O. Each variable is an independent GET/PUT pair, so they are
+    # ensured concurrently like the schedules phase.
+    serialized = {name: _dumps(v["Value"]) for name, v in vars_data.items()}
+    with ThreadPoolExecutor(max_workers=SCHEDULE_WORKERS) as executor:
+        futures = [
+            executor.submit(ensure_variable, name, v, serialized[name])
+            for name, v in vars_data.items()
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+def run_step(step_name: str, fn, *args, **kwargs):
+    print(f"==> {step_name}")
+    try:
+        result = fn(*args, **kwargs)
+        print(f"[OK] {step_name}")
+        print(20 * "-")
+        return result
+    except Exception as e:
+        print(f"[FAIL] {step_name}: {e}")
+        print(20 * "-")
+        raise
+
+def _content_sha256(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+def published_runbook_hash(runbook_name: str):
+    try:
+        published = get_automation_client().runbook.get_content(RG, AA, runbook_name)
+    except HttpResponseError:
+        # Never published (or content not retrievable); treat as changed.
+        return None
+    if not isinstance(published, (bytes, str)):
+        published = b"".join(published)
+    return _content_sha256(published)
+
+def import_and_publish_runbook(runbook_name: str, content: str):
+    print(f"  [?] Importing runbook '{runbook_name}'")
+    client = get_automation_client()
+    # Create or get runbook
+    try:
+        rb = client.runbook.get(RG, AA, runbook_name)
+        print(f"  [FOUND] Runbook '{runbook_name}' already exists. ")
+        if published_runbook_hash(runbook_name) == _content_sha256(content):
+            print(f"  [SKIP] Published content of '{runbook_name}' is up to date.")
+            return
+    except ResourceNotFoundError:
+        rb = client.runbook.create_or_update(
+            RG,
+            AA,
+            runbook_name,
+            {
+                "location": LOC,
+                "log_verbose": True,
+                "log_progress": True,
+                "runbook_type": "PowerShell72",
+                "draft": {}
+            },
+        )
+        print(f"  [NEW] Created runbook '{runbook_name}'")
+
+    draft_poller = client.runbook_draft.begin_replace_content(
+        RG, AA, runbook_name, content, polling_interval=LRO_POLLING_INTERVAL
+    )
+    draft_poller.result()
+    print(f"  [?] Publishing runbook '{runbook_name}'")
+    poller = client.runbook.begin_publish(RG, AA, runbook_name, polling_interval=LRO_POLLING_INTERVAL)
+    poller.result()
+
+@functools.lru_cache(maxsize=None)
+def convert_to_utc(iso_str: str, time_zone: str) -> str:
+    # Schedules commonly repeat the same (start/end, timezone) pairs; caching
+    # avoids reloading tz data and reconverting for every schedule entry.
+    if not time_zone or time_zone.upper() == "UTC":
+        return iso_str if iso_str.endswith('Z') else iso_str + 'Z'
+    
+    from zoneinfo import ZoneInfo
+
+    local_dt = datetime.fromisoformat(iso_str).replace(tzinfo=ZoneInfo(time_zone))
+    utc_dt = local_dt.astimezone(timezone.utc)
+    return utc_dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def ensure_schedule(name, schedule_def: dict):
+    description = schedule_def.get("Description", "")
+    frequency = schedule_def["Frequency"]
+    interval = schedule_def["Interval"] if "Interval" in schedule_def else None
+    time_zone = schedule_def.get("TimeZone", "UTC")
+
+    start_time = schedule_def["StartTime"]
+    end_time = schedule_def.get("EndTime", None)
+    start_time_utc = convert_to_utc(start_time, time_zone)
+    end_time_utc = convert_to_utc(end_time, time_zone) if end_time else None
+    if end_time_utc and end_time_utc <= start_time_utc:
+        raise ValueError(f"EndTime {end_time} must be after StartTime {start_time}")
+
+    client = get_automation_client()
+    try:
+        schedule = client.schedule.get(RG, AA, name)
+        print(f"  [FOUND] Schedule '{name}' already exists. Updating is not supported for shared resources. Skipping...")
+    except ResourceNotFoundError:
+        print(f"  [NEW] Creating schedule '{name}'")
+        schedule = client.schedule.create_or_update(
+            RG,
+            AA,
+            name,
+            {
+                "name": name,
+                "description": "",
+                "start_time": start_time_utc,
+                "expiry_time": end_time_utc,
+                "frequency": frequency,
+                "interval": interval,
+                "time_zone": time_zone,
+                "advanced_schedule": None,
+            },
+        )
+    
+        current_status = schedule.is_enabled
+        is_enabled = schedule_def.get("IsEnabled", True)
+        if current_status != is_enabled:
+            print(f"  [?] Updating schedule '{name}' enabled status to {is_enabled}")
+            schedule = client.schedule.update(
+                RG,
+                AA,
+                name,
+                {
+                    "is_enabled": is_enabled
+                }
+            )
+    
+    return schedule
+
+def list_existing_schedule_links() -> set:
+    # One paged call covers every schedule; listing per schedule repeats the
+    # same full scan N times.
+    return {
+        (js.schedule.name, js.runbook.name)
+        for js in automation_client.job_schedule.list_by_automation_account(RG, AA)
+    }
+
+def ensure_schedule_link(name, schedule_def: dict, params: dict, existing_links: set):
+    runbook_name = schedule_def["RunbookName"]
+    parameters = schedule_def.get("Parameters", {})
+    parameters.update(params or {})
+
+    client = get_automation_client()
+    if (name, runbook_name) in existing_links:
+        print(f"  [FOUND] Link for schedule '{name}' to runbook '{runbook_name}' already exists. Updating is not supported for schedule job. Skipping...")
+        return
+    
+    job_schedule_id = str(uuid.uuid4())
+    params_payload = { key: str(value) for key, value in parameters.items() } if parameters else {}
+    print(f"  [NEW] Linking schedule '{name}' to runbook '{runbook_name}'")
+    client.job_schedule.create(
+        RG,
+        AA,
+        job_schedule_id,
+        {
+            "schedule": {"name": name},
+            "runbook": {"name": runbook_name},
+            "parameters": params_payload
+        },
+    )
+
+def ensure_schedule_and_link(name, schedule_def: dict, existing_links: set):
+    run_step(f"Ensure Schedule {name}", ensure_schedule, name, schedule_def)
+    run_step(f"Ensure Schedule Link for {name}", ensure_schedule_link, name, schedule_def, resource_def_data, existing_links)
+
+def main():
+    try:
+        run_step("Ensure Automation Account", ensure_automation_account)
+        with ThreadPoolExecutor(max_workers=SCHEDULE_WORKERS) as executor:
+            # Variables and the runbook publish LRO are independent, so poll
+            # them concurrently instead of serializing the two phases.
+            setup_futures = [
+                executor.submit(run_step, "Create Variables", create_variables),
+                executor.submit(run_step, f"Import & Publish Runbook {UPDATE_RUNBOOK_NAME}", import_and_publish_runbook, UPDATE_RUNBOOK_NAME, update_runbook_content),
+            ]
+            for future in as_completed(setup_futures):
+                future.result()
+            # Schedule links reference the runbook, so the schedules phase
+            # starts only after the publish completes.
+            existing_links = list_existing_schedule_links() if schedules_data else set()
+            futures = [executor.submit(ensure_schedule_and_link, name, s, existing_links) for name, s in schedules_data.items()]
+            for future in as_completed(futures):
+                future.result()
+        print("Done.")
+    except Exception as e:
+        print("Aborting due to previous failure. ", {e})
+        sys.exit(1)
+
+if __name__ == "__main__":
     main()
\ No newline at end of file